@@ -92,16 +92,21 @@ find_latest_workbook() {
     local directory="$1"
     local exclude_patterns=("_backup" "_cleaned" "Archive" "backups")
 
-    local workbook=$(find "$directory" -type f \( -name "*.twb" -o -name "*.twbx" \) 2>/dev/null | while read -r file; do
-        local skip=false
-        for pattern in "${exclude_patterns[@]}"; do
-            if [[ "$file" == *"$pattern"* ]]; then
-                skip=true
-                break
-            fi
-        done
-        $skip || echo "$file"
-    done | xargs ls -t 2>/dev/null | head -1)
+    # Single find walk: extension and exclude checks happen inside find
+    # (exclude patterns are case-insensitive, matching Find-LatestWorkbook on Windows)
+    local find_args=("$directory" -type f \( -name "*.twb" -o -name "*.twbx" \))
+    local pattern
+    for pattern in "${exclude_patterns[@]}"; do
+        find_args+=(! -ipath "*${pattern}*")
+    done
+
+    # Keep the newest file in one pass instead of sorting every candidate
+    local workbook="" file
+    while IFS= read -r -d '' file; do
+        if [[ -z "$workbook" || "$file" -nt "$workbook" ]]; then
+            workbook="$file"
+        fi
+    done < <(find "${find_args[@]}" -print0 2>/dev/null)
 
     echo "$workbook"
 }
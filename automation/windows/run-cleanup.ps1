@@ -130,17 +130,25 @@ function Find-LatestWorkbook {
         [string[]]$ExcludePatterns = @("_backup", "_cleaned", "Archive", "backups")
     )
 
-    $workbooks = Get-ChildItem -Path $Directory -Recurse -Include "*.twb", "*.twbx" -File |
+    # Build one case-insensitive regex up front instead of testing each pattern per file
+    $excludeRegex = ($ExcludePatterns | ForEach-Object { [regex]::Escape($_) }) -join "|"
+
+    # Keep the newest file as results stream in instead of sorting every candidate
+    $latest = $null
+
+    # -Filter is applied by the filesystem during the walk (-Include re-filters every entry)
+    Get-ChildItem -Path $Directory -Recurse -Filter "*.twb*" -File |
         Where-Object {
-            $path = $_.FullName
-            -not ($ExcludePatterns | Where-Object { $path -match $_ })
+            ($_.Extension -eq ".twb" -or $_.Extension -eq ".twbx") -and
+            (-not $excludeRegex -or $_.FullName -notmatch $excludeRegex)
         } |
-        Sort-Object LastWriteTime -Descending
+        ForEach-Object {
+            if ($null -eq $latest -or $_.LastWriteTime -gt $latest.LastWriteTime) {
+                $latest = $_
+            }
+        }
 
-    if ($workbooks.Count -gt 0) {
-        return $workbooks[0]
-    }
-    return $null
+    return $latest
 }
 
 function Get-FoldersToProcess {
@@ -2,9 +2,89 @@
 """Extract all calculated fields from a .twb file as JSON."""
 import sys
 import json
-import xml.etree.ElementTree as ET
 import html
 
+# Prefer lxml (libxml2) for faster parsing of large workbooks; fall back to stdlib
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
+# orjson serializes large listings several times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def iter_columns(source):
+    """
+    Stream <column> elements from a workbook without keeping the full tree.
+
+    Each column is yielded once fully parsed. Outside columns, every element is
+    dropped from its parent as soon as it ends (and each column right after it
+    is yielded), so peak memory stays flat regardless of workbook size.
+    """
+    if HAS_LXML:
+        # Comments and PIs would otherwise sit between elements in the tree
+        context = ET.iterparse(source, events=('start', 'end'), huge_tree=True,
+                               collect_ids=False, remove_comments=True, remove_pis=True)
+    else:
+        context = ET.iterparse(source, events=('start', 'end'))
+
+    stack = []  # open elements, root first
+    column_depth = 0  # > 0 while inside a <column>, whose children must stay
+    for event, elem in context:
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == 'column':
+                column_depth += 1
+            continue
+
+        stack.pop()
+        if elem.tag == 'column':
+            column_depth -= 1
+            yield elem
+        if column_depth == 0 and stack:
+            # Earlier siblings are already gone, so this element is its parent's first child
+            del stack[-1][0]
+
+
+def column_info(column, include_full_formula=False):
+    """Build the JSON entry for a calculated <column>, or None if it has no calculation."""
+    calc = column.find('calculation')
+    if calc is None:
+        return None
+
+    formula = calc.get('formula', '')
+
+    # Check if formula has a comment
+    has_comment = formula.strip().startswith('//')
+
+    # Truncate formula for display unless full formula requested
+    if include_full_formula:
+        formula_display = formula
+    else:
+        formula_display = formula[:200] + ('...' if len(formula) > 200 else '')
+
+    calc_info = {
+        "name": column.get('name'),
+        "caption": column.get('caption'),
+        "datatype": column.get('datatype'),
+        "role": column.get('role'),
+        "type": column.get('type'),
+        "has_comment": has_comment,
+        "formula_preview": formula_display
+    }
+
+    if include_full_formula:
+        calc_info["formula_full"] = formula
+
+    return calc_info
+
+
 def list_calculations(twb_path, include_full_formula=False):
     """
     Extract all calculated fields from a Tableau workbook.
@@ -16,45 +96,60 @@ def list_calculations(twb_path, include_full_formula=False):
     Returns:
         dict with 'count', 'calculations' list, and optional 'error'
     """
+    calculations = []
+
     try:
-        tree = ET.parse(twb_path)
-        root = tree.getroot()
-    except ET.ParseError as e:
+        # Open the file ourselves so a missing path raises FileNotFoundError under lxml too
+        with open(twb_path, 'rb') as f:
+            for column in iter_columns(f):
+                calc_info = column_info(column, include_full_formula)
+                if calc_info is not None:
+                    calculations.append(calc_info)
+    except ET.ParseError as e:  # lxml's XMLSyntaxError subclasses ParseError
         return {"success": False, "error": f"XML parse error: {e}"}
     except FileNotFoundError:
         return {"success": False, "error": f"File not found: {twb_path}"}
 
-    calculations = []
+    return summarize(calculations)
 
-    for column in root.iter('column'):
-        calc = column.find('calculation')
-        if calc is not None:
-            formula = calc.get('formula', '')
-
-            # Check if formula has a comment
-            has_comment = formula.strip().startswith('//')
-
-            # Truncate formula for display unless full formula requested
-            if include_full_formula:
-                formula_display = formula
-            else:
-                formula_display = formula[:200] + ('...' if len(formula) > 200 else '')
-
-            calc_info = {
-                "name": column.get('name'),
-                "caption": column.get('caption'),
-                "datatype": column.get('datatype'),
-                "role": column.get('role'),
-                "type": column.get('type'),
-                "has_comment": has_comment,
-                "formula_preview": formula_display
-            }
-
-            if include_full_formula:
-                calc_info["formula_full"] = formula
 
+def list_calculations_from_root(root, include_full_formula=False):
+    """
+    Extract all calculated fields from an already-parsed workbook.
+
+    Lets callers that also run validate_cleanup share a single parse.
+
+    Args:
+        root: Root element of the parsed .twb
+        include_full_formula: If True, include complete formula text
+
+    Returns:
+        dict with 'count' and 'calculations' list
+    """
+    calculations = []
+    # lxml's find() is slow per call, so let its native predicate skip plain columns;
+    # with stdlib, iter() plus the find() in column_info is faster than the predicate
+    if HAS_LXML:
+        columns = root.iterfind('.//column[calculation]')
+    else:
+        columns = root.iter('column')
+    for column in columns:
+        calc_info = column_info(column, include_full_formula)
+        if calc_info is not None:
             calculations.append(calc_info)
 
+    return summarize(calculations)
+
+
+def dump_json(data):
+    """Serialize to indented UTF-8 JSON bytes (orjson when installed, else stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def summarize(calculations):
+    """Sort calculation entries and wrap them with summary counts."""
     # Sort by caption for easier reading
     calculations.sort(key=lambda x: (x.get('caption') or x.get('name') or '').lower())
 
@@ -75,7 +170,8 @@ if __name__ == '__main__':
     include_full = '--full' in sys.argv
 
     result = list_calculations(twb_path, include_full_formula=include_full)
-    print(json.dumps(result, indent=2))
+    # Write UTF-8 bytes directly - avoids re-encoding and console codepage errors on Windows
+    sys.stdout.buffer.write(dump_json(result) + b'\n')
 
     if not result.get("success", True):
         sys.exit(1)
@@ -12,19 +12,33 @@ Rules checked:
 - X1-X2: XML rules
 - S1-S3: Safety rules (requires backup_path argument)
 """
+import os
 import sys
 import re
-import xml.etree.ElementTree as ET
+import functools
+import mmap
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Prefer lxml (libxml2) for faster parsing of large workbooks; fall back to stdlib
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
 # Fix Windows console encoding for emoji/Unicode output
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # Acronyms to preserve (must stay uppercase)
-ACRONYMS = {'ID', 'YTD', 'MTD', 'QTD', 'KPI', 'ROI', 'YOY', 'MOM', 'WOW',
-            'LOD', 'RLS', 'API', 'URL', 'SQL', 'AVG', 'SUM', 'MIN', 'MAX'}
+ACRONYMS = frozenset({'ID', 'YTD', 'MTD', 'QTD', 'KPI', 'ROI', 'YOY', 'MOM', 'WOW',
+                      'LOD', 'RLS', 'API', 'URL', 'SQL', 'AVG', 'SUM', 'MIN', 'MAX'})
+
+# Lowercase word -> canonical acronym, so each word needs a single dict lookup
+ACRONYM_LOOKUP = {a.lower(): a for a in ACRONYMS}
 
 # Simplified 6 folder categories (broad categories, organize by PURPOSE not technique)
 # Note: LOD removed - LOD calcs go in folder matching their semantic purpose
@@ -58,32 +72,80 @@ LAZY_COMMENT_PATTERNS = [
 # Minimum comment length (characters after //)
 MIN_COMMENT_LENGTH = 15
 
+# Workbooks with more calcs than this validate captions/comments across worker processes
+PARALLEL_THRESHOLD = 5000
+
+# Files larger than this are stream-parsed, keeping only the elements the rules read
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+# Characters read per chunk while stream-parsing
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Precompiled patterns (built once at import instead of per field)
+# C4: whole words; an acronym matches \bACR\b exactly when a full \w+ run equals it
+WORD_PATTERN = re.compile(r'\w+')
+# M1: leading whitespace before a formula's comment
+LEADING_WHITESPACE_PATTERN = re.compile(r'\s*')
+# C5: double parentheses "()()"
+DOUBLE_PAREN_PATTERN = re.compile(r'\)\s*\(')
+# M5: & not starting an entity reference (&amp; &apos; &quot; &lt; &gt; &#13; &#x1F4CA;)
+UNESCAPED_AMP_PATTERN = re.compile(r'&(?!(amp|apos|quot|lt|gt|#\d+|#x[0-9A-Fa-f]+);)')
+# F10/F11: folder name starts with an emoji or an HTML entity code (&#x1F4CA; format)
+EMOJI_PREFIX_PATTERN = re.compile(r'^([\U0001F300-\U0001F9FF]|&#x[0-9A-Fa-f]+;)')
+# M3b: all lazy comment patterns as one alternation, so a comment is matched once
+LAZY_COMMENT_PATTERN = re.compile('|'.join(f'(?:{p})' for p in LAZY_COMMENT_PATTERNS), re.IGNORECASE)
+# M4/M5: raw (still entity-encoded) formulas keyed by column name, either quote style
+# (bytes pattern: it scans the memory-mapped file). The search for <calculation> stops
+# at the next <column> or </column>, so a column without a formula never runs ahead
+# to a later column's formula (or to the end of the file)
+RAW_FORMULA_PATTERN = re.compile(
+    rb"""<column[^>]*name=(?:'([^']+)'|"([^"]+)")[^>]*>(?:(?!<column[\s/>]|</column>).)*?"""
+    rb"""<calculation[^>]*formula=(?:'([^']*)'|"([^"]*)")""",
+    re.DOTALL)
+
+def make_parser():
+    """Return an XML parser tuned for large workbooks (None = stdlib default)."""
+    if HAS_LXML:
+        return ET.XMLParser(huge_tree=True, collect_ids=False)
+    return None
+
+
 class ValidationResult:
     def __init__(self):
-        self.errors = []
-        self.passes = []
+        self.errors = []  # (rule, field, message) tuples, formatted only when printed
+        self.pass_count = 0  # passes are only ever counted, so no messages are kept
 
     def error(self, rule, field, message):
-        self.errors.append(f"[ERROR] {rule}: \"{field}\" - {message}")
+        self.errors.append((rule, field, message))
 
     def passed(self, rule, field, message="OK"):
-        self.passes.append(f"[PASS] {rule}: \"{field}\" - {message}")
+        self.pass_count += 1
 
     def has_errors(self):
         return len(self.errors) > 0
 
+    def error_lines(self, start=0):
+        """Yield formatted error lines, optionally only those recorded from index start on."""
+        for rule, field, message in self.errors[start:]:
+            yield f"[ERROR] {rule}: \"{field}\" - {message}"
+
+    def extend(self, other):
+        """Append another result's errors and passes (e.g. from a worker process)."""
+        self.errors.extend(other.errors)
+        self.pass_count += other.pass_count
 
+
+@functools.lru_cache(maxsize=4096)
 def to_title_case(text):
-    """Convert to title case while preserving acronyms."""
-    words = text.replace('_', ' ').split()
-    result = []
-    for word in words:
-        upper = word.upper()
-        if upper in ACRONYMS:
-            result.append(upper)
-        else:
-            result.append(word.capitalize())
-    return ' '.join(result)
+    """Convert to title case while preserving acronyms (memoized - captions repeat across datasources)."""
+    lookup = ACRONYM_LOOKUP.get
+    return ' '.join([lookup(word.lower()) or word.capitalize()
+                     for word in text.replace('_', ' ').split()])
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_caption(caption):
+    """Lowercase a caption and turn _ and - into spaces, for the M3c restated-caption check (memoized)."""
+    return caption.lower().replace('_', ' ').replace('-', ' ').strip()
 
 
 def validate_caption(caption, name, result):
@@ -91,7 +153,10 @@ def validate_caption(caption, name, result):
     display_name = caption or name
 
     # C1: Must be Title Case
-    if caption:
+    # C1 only reports differences beyond letter case. An ASCII caption with no underscores
+    # and single spaces between words can only differ from to_title_case() in case, so the
+    # conversion is skipped for it
+    if caption and ('_' in caption or not caption.isascii() or caption != ' '.join(caption.split())):
         expected = to_title_case(caption)
         if caption != expected and caption.lower() != expected.lower():
             # Check if it's actually wrong (not just acronym differences)
@@ -108,15 +173,17 @@ def validate_caption(caption, name, result):
         result.error("C3", display_name, "has deprecated c_ prefix")
 
     # C4: Preserve acronyms (check if acronym is not uppercase)
+    # One scan over the caption's words with a hash lookup each, however many acronyms exist
     if caption:
-        for acronym in ACRONYMS:
-            pattern = re.compile(rf'\b{acronym}\b', re.IGNORECASE)
-            match = pattern.search(caption)
-            if match and match.group() != acronym:
-                result.error("C4", display_name, f"\"{match.group()}\" should be \"{acronym}\"")
+        reported = set()
+        for word in WORD_PATTERN.findall(caption):
+            acronym = ACRONYM_LOOKUP.get(word.lower())
+            if acronym and word != acronym and acronym not in reported:
+                reported.add(acronym)
+                result.error("C4", display_name, f"\"{word}\" should be \"{acronym}\"")
 
     # C5: No double parentheses
-    if caption and re.search(r'\)\s*\(', caption):
+    if caption and DOUBLE_PAREN_PATTERN.search(caption):
         result.error("C5", display_name, "has double parentheses \"()()\"")
 
 
@@ -143,15 +210,16 @@ def validate_comment(formula, caption, name, result, raw_formula=None, calc_clas
         result.passed("M1", display_name, "no formula attribute - skipping")
         return
 
-    formula_stripped = formula.strip() if formula else ''
+    # Index of the first non-whitespace character (avoids copying long formulas with strip())
+    start = LEADING_WHITESPACE_PATTERN.match(formula).end()
 
     # Skip empty formulas
-    if not formula_stripped:
+    if start == len(formula):
         result.passed("M1", display_name, "empty formula - skipping")
         return
 
     # M1: Must have comment
-    if not formula_stripped.startswith('//'):
+    if not formula.startswith('//', start):
         result.error("M1", display_name, "missing comment")
         return  # Can't check other comment rules if no comment
 
@@ -161,8 +229,15 @@ def validate_comment(formula, caption, name, result, raw_formula=None, calc_clas
     result.passed("M2", display_name, "starts with //")
 
     # M3: Comment explains PURPOSE (not vague/lazy)
-    # Extract first line as the comment
-    comment_line = formula_stripped.split('\n')[0] if '\n' in formula_stripped else formula_stripped.split('&#13;')[0]
+    # Extract first line as the comment (slice up to the first line break only).
+    # Line breaks in trailing whitespace don't count, as if the formula were stripped.
+    end = len(formula)
+    while formula[end - 1].isspace():
+        end -= 1
+    line_end = formula.find('\n', start, end)
+    if line_end == -1:
+        line_end = formula.find('&#13;', start, end)
+    comment_line = formula[start:line_end if line_end != -1 else end]
     comment_text = comment_line.replace('//', '').strip()
 
     # M3a: Check minimum length
@@ -171,15 +246,13 @@ def validate_comment(formula, caption, name, result, raw_formula=None, calc_clas
     else:
         # M3b: Check for lazy patterns
         is_lazy = False
-        for pattern in LAZY_COMMENT_PATTERNS:
-            if re.match(pattern, comment_line, re.IGNORECASE):
-                result.error("M3", display_name, f"lazy/generic comment - explain PURPOSE, not just \"{comment_text[:30]}\"")
-                is_lazy = True
-                break
+        if LAZY_COMMENT_PATTERN.match(comment_line):
+            result.error("M3", display_name, f"lazy/generic comment - explain PURPOSE, not just \"{comment_text[:30]}\"")
+            is_lazy = True
 
         # M3c: Check if comment just restates caption
         if not is_lazy and caption:
-            caption_normalized = caption.lower().replace('_', ' ').replace('-', ' ').strip()
+            caption_normalized = normalize_caption(caption)
             comment_normalized = comment_text.lower().strip()
             if caption_normalized == comment_normalized:
                 result.error("M3", display_name, "comment just restates caption - explain PURPOSE instead")
@@ -194,30 +267,124 @@ def validate_comment(formula, caption, name, result, raw_formula=None, calc_clas
 
     # M5: No unescaped & in RAW file
     # Use raw_formula (before ElementTree decodes &amp; to &)
-    if raw_formula:
+    # Plain substring test first: formulas without any & never reach the regex
+    if raw_formula and '&' in raw_formula:
         # In raw XML, & should be &amp; (except for entity refs like &#13; or &apos;)
         # Find & NOT followed by amp; apos; quot; lt; gt; or # (for &#13; etc.)
-        if re.search(r'&(?!(amp|apos|quot|lt|gt|#\d+|#x[0-9A-Fa-f]+);)', raw_formula):
+        if UNESCAPED_AMP_PATTERN.search(raw_formula):
             result.error("M5", display_name, "unescaped & in formula/comment")
     # else: skip M5 check if we don't have raw formula
 
     # M6: No unescaped ' in XML attribute context
     # This is tricky - single quotes in formulas are usually OK, but in comments they should be &apos;
     # We'll flag if there's a comment with ' that's not &apos;
-    if formula_stripped.startswith('//'):
-        comment_part = formula_stripped.split('\n')[0] if '\n' in formula_stripped else formula_stripped
-        if "'" in comment_part and "&apos;" not in comment_part:
-            # Only warn, not error - single quotes in comments are often OK
-            pass
+    if "'" in comment_line and "&apos;" not in comment_line:
+        # Only warn, not error - single quotes in comments are often OK
+        pass
 
 
-def validate_folders(root, calculations, result):
-    """Check folder rules F1-F11."""
+def validate_fields_chunk(field_records):
+    """Run caption (C1-C5) and comment (M1-M6) rules over a slice of calcs.
 
-    # Find all folders
-    folders_common = root.find('.//folders-common')
-    layout = root.find('.//layout')
-    all_folders = root.findall('.//folder')
+    Module-level so it can be pickled into worker processes.
+
+    Args:
+        field_records: (name, caption, class, formula, raw_formula) tuples
+
+    Returns:
+        (caption_result, comment_result) ValidationResult pair
+    """
+    caption_result = ValidationResult()
+    comment_result = ValidationResult()
+    for name, caption, calc_class, formula, raw_formula in field_records:
+        validate_caption(caption, name, caption_result)
+        validate_comment(formula, caption, name, comment_result,
+                         raw_formula=raw_formula, calc_class=calc_class)
+    return caption_result, comment_result
+
+
+def validate_fields(field_records):
+    """Run caption and comment rules, sharding across CPU cores for very large workbooks.
+
+    Fields are independent, so chunks are validated in parallel and merged back
+    in their original order. Falls back to a single process if a pool can't start.
+    """
+    workers = os.cpu_count() or 1
+    if len(field_records) <= PARALLEL_THRESHOLD or workers < 2:
+        return validate_fields_chunk(field_records)
+
+    size = -(-len(field_records) // workers)  # ceiling division
+    chunks = [field_records[i:i + size] for i in range(0, len(field_records), size)]
+    caption_result = ValidationResult()
+    comment_result = ValidationResult()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_captions, chunk_comments in pool.map(validate_fields_chunk, chunks):
+                caption_result.extend(chunk_captions)
+                comment_result.extend(chunk_comments)
+    except (OSError, RuntimeError):
+        # e.g. no multiprocessing support in a sandbox - validate in-process instead
+        return validate_fields_chunk(field_records)
+    return caption_result, comment_result
+
+
+def scan_workbook(root):
+    """Collect everything the field and folder rules need from the tree.
+
+    Returns:
+        (calculations, folders_common, layout, all_folders): every <column> holding a
+        <calculation> and every <folder>, in document order, plus the first
+        <folders-common> and first <layout> (None when missing)
+    """
+    folders_common = None
+    layout = None
+    all_folders = []
+
+    if HAS_LXML:
+        # lxml filters tags and evaluates the [calculation] predicate natively; two such
+        # walks beat one walk that calls find() on every column from Python
+        calculations = list(root.iterfind('.//column[calculation]'))
+        elements = root.iter('folders-common', 'layout', 'folder')
+    else:
+        # stdlib iter() only accepts a single tag, so gather everything in one walk
+        calculations = []
+        elements = root.iter()
+    for elem in elements:
+        tag = elem.tag
+        if tag == 'folder':
+            all_folders.append(elem)
+        elif tag == 'column':
+            if elem.find('calculation') is not None:
+                calculations.append(elem)
+        elif tag == 'folders-common' and folders_common is None:
+            folders_common = elem
+        elif tag == 'layout' and layout is None:
+            layout = elem
+
+    return calculations, folders_common, layout, all_folders
+
+
+def get_parent(root, elem):
+    """Return the parent of elem (O(1) with lxml; stdlib elements have no parent link)."""
+    if HAS_LXML:
+        return elem.getparent()
+    # One walk with identity checks; no per-element child lists or parent map
+    for candidate in root.iter():
+        for child in candidate:
+            if child is elem:
+                return candidate
+    return None
+
+
+def validate_folders(root, folders_common, layout, all_folders, calc_records, result):
+    """Check folder rules F1-F11.
+
+    Args:
+        root: Workbook root element
+        folders_common, layout, all_folders: Folder elements from scan_workbook
+        calc_records: (name, caption, class, formula) tuples from validate_workbook
+        result: ValidationResult object
+    """
 
     # F2: <folders-common> exists
     if folders_common is None:
@@ -228,17 +395,11 @@ def validate_folders(root, calculations, result):
 
     # F3: <folders-common> before <layout>
     if layout is not None:
-        # Check position in parent
-        parent = None
-        for elem in root.iter():
-            if folders_common in list(elem) and layout in list(elem):
-                parent = elem
-                break
-        if parent is not None:
-            children = list(parent)
-            fc_idx = children.index(folders_common) if folders_common in children else -1
-            layout_idx = children.index(layout) if layout in children else -1
-            if fc_idx > layout_idx and layout_idx != -1:
+        # Check position in parent (only comparable when they are siblings)
+        parent = get_parent(root, folders_common)
+        children = list(parent) if parent is not None else []
+        if layout in children:
+            if children.index(folders_common) > children.index(layout):
                 result.error("F3", "XML", "<folders-common> must appear before <layout>")
             else:
                 result.passed("F3", "XML", "<folders-common> is before <layout>")
@@ -246,8 +407,9 @@ def validate_folders(root, calculations, result):
     # Get folders inside folders-common
     folders_in_common = folders_common.findall('folder') if folders_common is not None else []
 
-    # F4: <folder> inside <folders-common>
-    folders_outside = [f for f in all_folders if f not in folders_in_common]
+    # F4: <folder> inside <folders-common> (identity set: one hash lookup per folder)
+    inner_ids = {id(f) for f in folders_in_common}
+    folders_outside = [f for f in all_folders if id(f) not in inner_ids]
     if folders_outside:
         result.error("F4", "XML", f"{len(folders_outside)} <folder> elements outside <folders-common>")
     else:
@@ -258,35 +420,30 @@ def validate_folders(root, calculations, result):
         if folder.get('role'):
             result.error("F5", folder.get('name', 'unnamed'), "has invalid role attribute")
 
-    # Collect all field names in folders
-    fields_in_folders = set()
-    for folder in folders_in_common:
-        for item in folder.findall('folder-item'):
-            field_name = item.get('name')
-            if field_name:
-                fields_in_folders.add(field_name)
+    # Collect every folder item's name once, in document order (shared by F1 and F6)
+    item_names = [item.get('name') for folder in folders_in_common
+                  for item in folder.findall('folder-item')]
+    fields_in_folders = {name for name in item_names if name}
 
     # Get all calculation names
-    calc_names = {c.get('name') for c in calculations}
+    calc_names = {name for name, _, _, _ in calc_records}
+
+    # Folder items are usually bracketed ("[Calc]"); also index the bare name so a
+    # calc named either "[Calc]" or "Calc" is found with a single lookup
+    fields_lookup = fields_in_folders | {
+        n[1:-1] for n in fields_in_folders if n.startswith('[') and n.endswith(']')}
 
     # F1: All calcs in a folder
-    for calc in calculations:
-        calc_name = calc.get('name')
-        display_name = calc.get('caption') or calc_name
-        if calc_name and calc_name not in fields_in_folders and f'[{calc_name}]' not in fields_in_folders:
-            # Try bracket format
-            bracketed = f'[{calc_name}]' if not calc_name.startswith('[') else calc_name
-            if bracketed not in fields_in_folders and calc_name not in fields_in_folders:
-                result.error("F1", display_name, "not in any folder")
+    for calc_name, caption, _, _ in calc_records:
+        if calc_name and calc_name not in fields_lookup:
+            result.error("F1", caption or calc_name, "not in any folder")
 
     # F6: Field names match exactly
-    for folder in folders_in_common:
-        for item in folder.findall('folder-item'):
-            field_name = item.get('name', '')
-            # Remove brackets for comparison
-            clean_name = field_name.strip('[]')
-            if clean_name not in calc_names and field_name not in calc_names:
-                result.error("F6", field_name, "not found in workbook")
+    for field_name in item_names:
+        field_name = field_name or ''
+        # Exact name first (the usual bracketed case); only strip brackets when that misses
+        if field_name not in calc_names and field_name.strip('[]') not in calc_names:
+            result.error("F6", field_name, "not found in workbook")
 
     # F7: show-structure='true' in <layout>
     # (Skipped - Claude will fix this automatically when creating folders)
@@ -307,7 +464,6 @@ def validate_folders(root, calculations, result):
 
     # F10: Folder names start with emoji OR HTML entity code (&#x1F4CA; format)
     # (Relaxed - emoji prefixes are optional, just nice-to-have)
-    emoji_pattern = re.compile(r'^([\U0001F300-\U0001F9FF]|&#x[0-9A-Fa-f]+;)')
 
     # F11: No duplicate folder names or emojis
     folder_names = []
@@ -315,7 +471,7 @@ def validate_folders(root, calculations, result):
     for folder in folders_in_common:
         folder_name = folder.get('name', '')
         folder_names.append(folder_name)
-        match = emoji_pattern.match(folder_name)
+        match = EMOJI_PREFIX_PATTERN.match(folder_name)
         if match:
             folder_emojis.append(match.group())
 
@@ -334,16 +490,122 @@ def validate_folders(root, calculations, result):
         seen_emojis.add(emoji)
 
 
+def parse_pruned(twb_path, repair_utf8=False):
+    """Stream-parse a large workbook, keeping only what the validators read.
+
+    Calculated <column>s, <folders-common>, <layout> and <folder> elements are
+    kept along with their ancestors, in document order. Everything else is
+    dropped as soon as it has been parsed, so memory tracks the kept elements
+    rather than the size of the file. With repair_utf8, invalid UTF-8 is
+    replaced instead of failing the parse.
+    """
+    if HAS_LXML:
+        # Comments and PIs would otherwise sit between elements in the tree
+        parser = ET.XMLPullParser(events=('start', 'end'), huge_tree=True, collect_ids=False,
+                                  remove_comments=True, remove_pis=True)
+    else:
+        parser = ET.XMLPullParser(events=('start', 'end'))
+
+    root = None
+    stack = []  # [element, children kept so far] for each open element
+    subtree_depth = 0  # > 0 while inside a kept <column> or <folders-common>
+
+    def prune(events):
+        nonlocal root, subtree_depth
+        for event, elem in events:
+            tag = elem.tag
+            if event == 'start':
+                if root is None:
+                    root = elem
+                if tag == 'column' or tag == 'folders-common':
+                    subtree_depth += 1
+                stack.append([elem, 0])
+                continue
+
+            stack.pop()
+            if tag == 'column' or tag == 'folders-common':
+                subtree_depth -= 1
+            if subtree_depth or not stack:
+                continue
+            if tag == 'column':
+                keep = elem.find('calculation') is not None
+            elif tag in ('folders-common', 'layout', 'folder'):
+                keep = True
+            else:
+                keep = len(elem) > 0  # holds something kept further down
+            parent = stack[-1]
+            if keep:
+                parent[1] += 1
+            elif HAS_LXML:
+                parent[0].remove(elem)  # unlinks via the node's parent pointer
+            else:
+                # Earlier siblings are gone or counted, so elem sits right after the kept ones
+                # (later siblings from the same fed chunk may already follow it)
+                del parent[0][parent[1]]
+
+    # Feed raw bytes; only the repair pass pays for a decode/re-encode round trip
+    if repair_utf8:
+        f = open(twb_path, 'r', encoding='utf-8', errors='replace')
+        chunks = (chunk.encode('utf-8') for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), ''))
+    else:
+        f = open(twb_path, 'rb')
+        chunks = iter(lambda: f.read(STREAM_CHUNK_SIZE), b'')
+    with f:
+        for chunk in chunks:
+            parser.feed(chunk)
+            prune(parser.read_events())
+    parser.close()
+    prune(parser.read_events())
+    return root
+
+
+def find_raw_formulas(twb_path):
+    """Map column name -> formula exactly as written in the file (entities still encoded).
+
+    The file is memory-mapped and scanned as bytes, so it is never held in memory
+    as one string.
+    """
+    raw_formulas = {}
+    with open(twb_path, 'rb') as f:
+        try:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return raw_formulas
+        with content:
+            for name_sq, name_dq, formula_sq, formula_dq in (
+                    match.groups() for match in RAW_FORMULA_PATTERN.finditer(content)):
+                formula = (formula_sq if formula_sq is not None else formula_dq).decode('utf-8', 'replace')
+                if '\r' in formula:
+                    # Match text-mode reading, which turns \r\n and \r into \n
+                    formula = formula.replace('\r\n', '\n').replace('\r', '\n')
+                raw_formulas[(name_sq or name_dq).decode('utf-8', 'replace')] = formula
+    return raw_formulas
+
+
 def validate_xml(twb_path, result):
     """Check XML rules X1-X2."""
     try:
-        # Use explicit UTF-8 encoding with error handling to prevent crashes on corrupted characters
-        with open(twb_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-        root = ET.fromstring(content)
+        # Corrupted characters must not crash validation: if the raw bytes fail to
+        # parse, retry with invalid UTF-8 replaced
+        if os.path.getsize(twb_path) > STREAM_THRESHOLD_BYTES:
+            try:
+                root = parse_pruned(twb_path)
+            except ET.ParseError:
+                root = parse_pruned(twb_path, repair_utf8=True)
+        else:
+            # Parse the bytes as read: no str decode and re-encode on the happy path
+            with open(twb_path, 'rb') as f:
+                content = f.read()
+            try:
+                root = ET.fromstring(content, make_parser())
+            except ET.ParseError:
+                repaired = content.decode('utf-8', 'replace').encode('utf-8')
+                if repaired == content:
+                    raise
+                root = ET.fromstring(repaired, make_parser())
         result.passed("X1", "XML", "valid XML")
         return root
-    except ET.ParseError as e:
+    except ET.ParseError as e:  # lxml's XMLSyntaxError subclasses ParseError
         result.error("X1", "XML", f"parse error: {e}")
         return None
     except Exception as e:
@@ -368,47 +630,56 @@ def validate_safety(twb_path, backup_path, original_path, result):
         result.error("S3", "output", "original file was modified instead of _cleaned copy")
 
 
-def validate_workbook(twb_path, backup_path=None, original_path=None):
-    """Run all validations on a workbook."""
-    result = ValidationResult()
+def print_errors(result, start=0):
+    """Print a section's errors (from index start on) with a single write."""
+    print('\n'.join(f"  {line}" for line in result.error_lines(start)))
+
 
+def print_header(twb_path):
+    """Print the validation report banner."""
     print(f"\n{'='*50}")
     print(f"  Tableau Cleanup Validation")
     print(f"  {twb_path}")
     print(f"{'='*50}\n")
 
-    # Read raw content for M4/M5 checks (before ElementTree decodes entities)
-    with open(twb_path, 'r', encoding='utf-8', errors='replace') as f:
-        raw_content = f.read()
 
-    # Build lookup of raw formulas by column name
-    # This preserves entity encoding like &#13;&#10; and &amp;
-    raw_formulas = {}
-    for match in re.finditer(
-        r"<column[^>]*name='([^']+)'[^>]*>.*?<calculation[^>]*formula='([^']*)'",
-        raw_content, re.DOTALL
-    ):
-        raw_formulas[match.group(1)] = match.group(2)
-    # Also check double-quoted attributes
-    for match in re.finditer(
-        r'<column[^>]*name="([^"]+)"[^>]*>.*?<calculation[^>]*formula="([^"]*)"',
-        raw_content, re.DOTALL
-    ):
-        raw_formulas[match.group(1)] = match.group(2)
+def validate_workbook(twb_path, backup_path=None, original_path=None):
+    """Run all validations on a workbook."""
+    result = ValidationResult()
 
     # X1-X2: XML validation
-    print("XML:")
     root = validate_xml(twb_path, result)
     if root is None:
         # Can't continue if XML is invalid
-        for e in result.errors:
-            print(f"  {e}")
+        print_header(twb_path)
+        print("XML:")
+        print_errors(result)
         return result
+
+    return validate_workbook_from_root(root, twb_path, backup_path, original_path, result)
+
+
+def validate_workbook_from_root(root, twb_path, backup_path=None, original_path=None, result=None):
+    """Run all validations on an already-parsed workbook.
+
+    Lets callers that parsed the .twb themselves skip a second parse. The file
+    is still scanned as raw text for the M4/M5 entity checks.
+    """
+    if result is None:
+        result = ValidationResult()
+        result.passed("X1", "XML", "valid XML")
+
+    print_header(twb_path)
+
+    # Build lookup of raw formulas by column name for M4/M5 checks
+    # This preserves entity encoding like &#13;&#10; and &amp; (before ElementTree decodes them)
+    raw_formulas = find_raw_formulas(twb_path)
+
+    print("XML:")
     print(f"  [PASS] X1: valid XML")
 
     # Get all calculations (deduplicated by name to avoid counting across datasources)
-    all_calcs = list(root.iter('column'))
-    all_calcs = [c for c in all_calcs if c.find('calculation') is not None]
+    all_calcs, folders_common, layout, all_folders = scan_workbook(root)
 
     # Deduplicate by name - keep first occurrence of each unique field
     seen_names = set()
@@ -426,48 +697,42 @@ def validate_workbook(twb_path, backup_path=None, original_path=None):
 
     print(f"\nFound {len(calculations)} unique calculated fields (excluding parameters)\n")
 
-    # C1-C5: Caption validation
-    print("CAPTIONS:")
-    caption_errors_before = len(result.errors)
+    # Read each calc's attributes once; every validator below works from these tuples
+    calc_records = []
     for col in calculations:
-        caption = col.get('caption')
-        name = col.get('name')
-        validate_caption(caption, name, result)
+        calc = col.find('calculation')
+        calc_records.append((col.get('name'), col.get('caption'), calc.get('class'), calc.get('formula')))
+
+    # Caption and comment rules are per-field, so run them together (in parallel when large)
+    field_records = [(name, caption, calc_class, formula, raw_formulas.get(name))
+                     for name, caption, calc_class, formula in calc_records]
+    caption_result, comment_result = validate_fields(field_records)
 
-    if len(result.errors) == caption_errors_before:
+    # C1-C5: Caption validation
+    print("CAPTIONS:")
+    if not caption_result.has_errors():
         print("  [PASS] All captions valid")
     else:
-        for e in result.errors[caption_errors_before:]:
-            print(f"  {e}")
+        print_errors(caption_result)
+    result.extend(caption_result)
 
     # M1-M6: Comment validation
     print("\nCOMMENTS:")
-    comment_errors_before = len(result.errors)
-    for col in calculations:
-        calc = col.find('calculation')
-        calc_class = calc.get('class') if calc is not None else None
-        formula = calc.get('formula') if calc is not None else None
-        caption = col.get('caption')
-        name = col.get('name')
-        raw_formula = raw_formulas.get(name)
-        validate_comment(formula, caption, name, result, raw_formula=raw_formula, calc_class=calc_class)
-
-    if len(result.errors) == comment_errors_before:
+    if not comment_result.has_errors():
         print("  [PASS] All comments valid")
     else:
-        for e in result.errors[comment_errors_before:]:
-            print(f"  {e}")
+        print_errors(comment_result)
+    result.extend(comment_result)
 
     # F1-F11: Folder validation
     print("\nFOLDERS:")
     folder_errors_before = len(result.errors)
-    validate_folders(root, calculations, result)
+    validate_folders(root, folders_common, layout, all_folders, calc_records, result)
 
     if len(result.errors) == folder_errors_before:
         print("  [PASS] All folder rules pass")
     else:
-        for e in result.errors[folder_errors_before:]:
-            print(f"  {e}")
+        print_errors(result, folder_errors_before)
 
     # S1-S3: Safety validation
     if backup_path or original_path:
@@ -476,7 +741,7 @@ def validate_workbook(twb_path, backup_path=None, original_path=None):
 
     # Summary
     print(f"\n{'='*50}")
-    print(f"  SUMMARY: {len(result.errors)} errors, {len(result.passes)} passed")
+    print(f"  SUMMARY: {len(result.errors)} errors, {result.pass_count} passed")
     print(f"{'='*50}")
 
     if result.has_errors():
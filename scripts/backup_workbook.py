@@ -6,6 +6,60 @@ import shutil
 import json
 from datetime import datetime
 
+# Buffer for the userspace copy fallback (shutil's own generic loop reads 64 KiB at a time)
+COPY_BUFFER_SIZE = 1 << 20
+
+def advise_sequential(f):
+    """Hint the kernel to read ahead aggressively on a file read start to finish."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+def copy_file(src, dst):
+    """
+    Copy file data and metadata, letting the kernel move the bytes when possible.
+
+    os.copy_file_range (Linux) copies without a userspace buffer and can
+    reflink on copy-on-write filesystems (btrfs, XFS). When it cannot be used
+    (e.g. EXDEV across mounts), Linux and macOS keep shutil.copy2, which
+    already copies in the kernel via sendfile / fcopyfile. Other platforms
+    fall back to a readinto loop over a reused 1 MiB buffer.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                # Data only - carry over mtime/permissions like copy2 does
+                shutil.copystat(src, dst)
+                return
+            # A short copy (the file changed size, or the filesystem returned 0
+            # early) must not pass as a backup: redo it below, which reads to EOF
+        except OSError:
+            pass
+
+    if sys.platform == 'darwin' or sys.platform.startswith('linux'):
+        shutil.copy2(src, dst)
+        return
+
+    buf = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buf)
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        advise_sequential(fsrc)
+        while True:
+            n = fsrc.readinto(view)
+            if not n:
+                break
+            fdst.write(view[:n])
+    shutil.copystat(src, dst)
+
 def backup(input_path, backup_dir=None):
     """
     Create a timestamped backup of a workbook.
@@ -34,7 +88,7 @@ def backup(input_path, backup_dir=None):
     backup_path = os.path.join(backup_dir, backup_name)
 
     try:
-        shutil.copy2(input_path, backup_path)
+        copy_file(input_path, backup_path)
         return {
             "success": True,
             "backup_path": backup_path,
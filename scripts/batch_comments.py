@@ -12,16 +12,58 @@ Usage:
   python batch_comments.py <twb_file> status    # Show progress
   python batch_comments.py <twb_file> reset     # Start over
 """
+import io
+import os
 import sys
 import json
 import re
-import xml.etree.ElementTree as ET
+import mmap
+import contextlib
+import functools
 from pathlib import Path
+from xml.parsers import expat
+from xml.sax.saxutils import unescape
 from datetime import datetime
 
-BATCH_SIZE = 10
+# Prefer lxml (libxml2) for faster parsing of large workbooks; fall back to stdlib
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
+# orjson serializes the (formula-heavy) batch file several times faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+BATCH_SIZE = 10
 
+# Above this size, skip element construction entirely and extract with raw expat
+SAX_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+# A <column> start tag (group 2 = raw name) and its first <calculation> start tag,
+# without running past the end of the column into the next one
+CALC_TAGS_PATTERN = re.compile(
+    rb"""(<column\s[^>]*?\bname=(?:'([^']+)'|"([^"]+)")[^>]*(?<!/)>)"""
+    rb"""(?:(?!<column[\s/>]|</column>).)*?(<calculation\s[^>]*?)/?>""",
+    re.DOTALL)
+
+# Comments that restate the obvious; 'done' also rejects "// the <word>"-style stubs
+LAZY_PATTERNS = (
+    re.compile(r'^//\s*(calculated\s+field|calculation|formula|field)\s*$', re.IGNORECASE),
+    re.compile(r'^//\s*\w{1,6}\s*$', re.IGNORECASE),
+)
+DONE_LAZY_PATTERNS = LAZY_PATTERNS + (
+    re.compile(r'^//\s*(this|the|a|an)\s+\w+\s*$', re.IGNORECASE),
+)
+
+
+# Path helpers are memoized: each command asks for them several times, and the
+# mkdir only needs to happen once per run
+@functools.lru_cache(maxsize=None)
 def get_cleanup_dir(twb_path):
     """Get or create .cleanup directory next to the workbook."""
     cleanup_dir = Path(twb_path).parent / '.cleanup'
@@ -29,54 +71,274 @@ def get_cleanup_dir(twb_path):
     return cleanup_dir
 
 
+@functools.lru_cache(maxsize=None)
 def get_batch_file(twb_path):
     """Get path to batch tracking file."""
     return get_cleanup_dir(twb_path) / 'comment_batches.json'
 
 
+@functools.lru_cache(maxsize=None)
+def get_calcs_cache_file(twb_path):
+    """Get path to the extracted-calculations cache."""
+    return get_cleanup_dir(twb_path) / 'calcs_cache.json'
+
+
+def dump_json(data, indent=True):
+    """Serialize to UTF-8 JSON bytes (orjson when installed, else stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def write_json(path, data, indent=True):
+    """Write JSON via a temp file and swap it in, so readers never see a partial file."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(dump_json(data, indent))
+    os.replace(tmp_path, path)
+
+
+def iter_columns(source):
+    """
+    Stream <column> elements from a workbook without keeping the full tree.
+
+    Each column is yielded once fully parsed. Outside columns, every element is
+    dropped from its parent as soon as it ends (and each column right after it
+    is yielded), so peak memory stays flat regardless of workbook size.
+    """
+    if HAS_LXML:
+        # Comments and PIs would otherwise sit between elements in the tree
+        context = ET.iterparse(source, events=('start', 'end'), huge_tree=True,
+                               collect_ids=False, remove_comments=True, remove_pis=True)
+    else:
+        context = ET.iterparse(source, events=('start', 'end'))
+
+    stack = []  # open elements, root first
+    column_depth = 0  # > 0 while inside a <column>, whose children must stay
+    for event, elem in context:
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == 'column':
+                column_depth += 1
+            continue
+
+        stack.pop()
+        if elem.tag == 'column':
+            column_depth -= 1
+            yield elem
+        if column_depth == 0 and stack:
+            # Earlier siblings are already gone, so this element is its parent's first child
+            del stack[-1][0]
+
+
+class CalculationCollector:
+    """Expat handlers that collect calculations without building any elements."""
+
+    def __init__(self):
+        self.calculations = []
+        self.depth = 0
+        # One [depth, column attrs, first <calculation> child attrs] frame per open <column>
+        self.columns = []
+
+    def start(self, tag, attrs):
+        self.depth += 1
+        if tag == 'column':
+            self.columns.append([self.depth, attrs, None])
+        elif tag == 'calculation' and self.columns:
+            column = self.columns[-1]
+            if column[0] == self.depth - 1 and column[2] is None:
+                column[2] = attrs
+
+    def end(self, tag):
+        if tag == 'column':
+            _, col_attrs, calc_attrs = self.columns.pop()
+            if calc_attrs is not None:
+                calculation = build_calculation(col_attrs, calc_attrs)
+                if calculation is not None:
+                    self.calculations.append(calculation)
+        self.depth -= 1
+
+
+def extract_calculations_sax(source):
+    """Extract calculations in a single expat pass, with no tree or Element objects."""
+    collector = CalculationCollector()
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = collector.start
+    parser.EndElementHandler = collector.end
+    parser.ParseFile(source)
+    return collector.calculations
+
+
+def extract_calculations_from(source, size):
+    """Extract calculations from a binary file object holding size bytes of workbook."""
+    if size > SAX_THRESHOLD_BYTES:
+        return extract_calculations_sax(source)
+
+    calculations = []
+    for col in iter_columns(source):
+        calculation = extract_calculation(col)
+        if calculation is not None:
+            calculations.append(calculation)
+
+    return calculations
+
+
 def extract_calculations(twb_path):
     """Extract all calculations from workbook with their formulas."""
-    with open(twb_path, 'r', encoding='utf-8', errors='replace') as f:
-        content = f.read()
+    try:
+        with open(twb_path, 'rb') as f:
+            return extract_calculations_from(f, os.path.getsize(twb_path))
+    except (ET.ParseError, expat.ExpatError):  # lxml's XMLSyntaxError subclasses ParseError
+        # Corrupted characters must not stop batching: if the raw bytes fail to
+        # parse, retry with invalid UTF-8 replaced
+        with open(twb_path, 'rb') as f:
+            content = f.read()
+        repaired = content.decode('utf-8', 'replace').encode('utf-8')
+        if repaired == content:
+            raise
+        return extract_calculations_from(io.BytesIO(repaired), len(repaired))
+
+
+def extract_calculation(col):
+    """Build the batch entry for a <column>, or None if it has no editable formula."""
+    calc = col.find('calculation')
+    if calc is None:
+        return None
+
+    return build_calculation(col.attrib, calc.attrib)
+
+
+def build_calculation(col_attrs, calc_attrs):
+    """Build the batch entry from <column> and <calculation> attributes, or None."""
+    # Skip bin/group calculations (no formula attribute possible)
+    calc_class = calc_attrs.get('class')
+    if calc_class in ('categorical-bin', 'quantitative-bin'):
+        return None
+
+    formula = calc_attrs.get('formula')
+    if formula is None:
+        return None
+
+    name = col_attrs.get('name', '')
+    caption = col_attrs.get('caption', '')
+
+    # Extract current comment if any
+    current_comment = None
+    stripped = formula.strip()
+    if stripped.startswith('//'):
+        # Get first line as comment
+        current_comment = stripped.partition('\n')[0]
+
+    return {
+        'name': name,
+        'caption': caption,
+        'formula': formula,
+        'current_comment': current_comment
+    }
 
-    root = ET.fromstring(content)
-    calculations = []
 
-    for col in root.iter('column'):
-        calc = col.find('calculation')
-        if calc is None:
-            continue
+def extract_calculations_by_name(twb_path):
+    """
+    Calculations keyed by name, reusing the previous result while the workbook is unchanged.
 
-        # Skip bin/group calculations (no formula attribute possible)
-        calc_class = calc.get('class')
-        if calc_class in ('categorical-bin', 'quantitative-bin'):
-            continue
+    The cache is keyed by the workbook's mtime and size, so any edit between
+    'next' and 'done' invalidates it.
+    """
+    cache_file = get_calcs_cache_file(twb_path)
+    stat = os.stat(twb_path)
+    cache_key = [stat.st_mtime_ns, stat.st_size]
 
-        formula = calc.get('formula')
-        if formula is None:
-            continue
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('cache_key') == cache_key:
+            return cached['calculations_by_name']
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass  # missing or unreadable cache: rebuild it
 
-        name = col.get('name', '')
-        caption = col.get('caption', '')
-
-        # Extract current comment if any
-        current_comment = None
-        if formula.strip().startswith('//'):
-            # Get first line as comment
-            first_line = formula.strip().split('\n')[0]
-            if first_line.startswith('//'):
-                current_comment = first_line
-
-        calculations.append({
-            'name': name,
-            'caption': caption,
-            'formula': formula,
-            'current_comment': current_comment
-        })
+    calculations = {c['name']: c for c in extract_calculations(twb_path)}
+
+    write_json(cache_file, {'cache_key': cache_key, 'calculations_by_name': calculations},
+               indent=False)
 
     return calculations
 
 
+@contextlib.contextmanager
+def map_workbook(twb_path):
+    """Memory-map the workbook read-only (empty files map to b'', which mmap rejects)."""
+    with open(twb_path, 'rb') as f:
+        try:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        with content:
+            yield content
+
+
+def spot_check_calculations(twb_path, names):
+    """
+    Look up just the named calculations by scanning the raw workbook bytes.
+
+    Only the matching <column>/<calculation> start tags are parsed, so this avoids a
+    full parse. Returns the same entries as extract_calculations_by_name(), or None
+    if any name could not be found this way (the caller then does the full parse).
+    """
+    wanted = set(names)
+    found = {}
+    with map_workbook(twb_path) as content:
+        for match in CALC_TAGS_PATTERN.finditer(content):
+            column_tag, name_sq, name_dq, calc_tag = match.groups()
+            if unescape((name_sq or name_dq).decode('utf-8', 'replace')) not in wanted:
+                continue
+            # Let the XML parser decode the attributes exactly as a full parse would
+            try:
+                col = ET.fromstring(column_tag + calc_tag + b'/></column>')
+            except ET.ParseError:
+                return None
+            calculation = extract_calculation(col)
+            if calculation is not None:
+                # Later duplicates win, as in the name-keyed dict
+                found[calculation['name']] = calculation
+
+    if not wanted.issubset(found):
+        return None
+    return found
+
+
+def load_batches(batch_file):
+    """
+    Read the batch tracking file, upgrading the older layout in memory.
+
+    Files written before calculations were stored once kept a 'calcs' name list
+    and a 'details' copy in every batch; they are converted to 'names' plus the
+    top-level 'calculations' table, and missing progress fields are computed
+    from the batch statuses (all saved that way on the next 'done').
+    """
+    with open(batch_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'calculations' not in data:
+        calculations = {}
+        for batch in data['batches']:
+            batch['names'] = batch.pop('calcs')
+            for calc in batch.pop('details', []):
+                calculations[calc['name']] = {
+                    'caption': calc.get('caption', ''),
+                    'formula': calc.get('formula', ''),
+                    'current_comment': calc.get('current_comment')
+                }
+        data['calculations'] = calculations
+
+    # Running progress fields are absent from older files; derive them once
+    if 'completed_count' not in data:
+        data['completed_count'] = sum(1 for b in data['batches'] if b['status'] == 'complete')
+    if 'next_pending' not in data:
+        data['next_pending'] = next((b['num'] for b in data['batches'] if b['status'] == 'pending'), None)
+
+    return data
+
+
 def init_batches(twb_path):
     """Initialize batch tracking file with all calculations."""
     calcs = extract_calculations(twb_path)
@@ -85,15 +347,14 @@ def init_batches(twb_path):
         print("No calculations found in workbook.")
         return
 
-    # Create batches of BATCH_SIZE
+    # Create batches of BATCH_SIZE; batches hold names only, the details are
+    # stored once in a top-level name -> calculation table
     batches = []
     for i in range(0, len(calcs), BATCH_SIZE):
-        batch_calcs = calcs[i:i + BATCH_SIZE]
         batches.append({
             'num': len(batches) + 1,
             'status': 'pending',
-            'calcs': [c['name'] for c in batch_calcs],
-            'details': batch_calcs
+            'names': [c['name'] for c in calcs[i:i + BATCH_SIZE]]
         })
 
     data = {
@@ -101,12 +362,22 @@ def init_batches(twb_path):
         'created': datetime.now().isoformat(),
         'total_calcs': len(calcs),
         'batch_size': BATCH_SIZE,
+        # Running progress, so next/status need not scan every batch
+        'completed_count': 0,
+        'next_pending': 1,
+        'calculations': {
+            c['name']: {
+                'caption': c['caption'],
+                'formula': c['formula'],
+                'current_comment': c['current_comment']
+            }
+            for c in calcs
+        },
         'batches': batches
     }
 
     batch_file = get_batch_file(twb_path)
-    with open(batch_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    write_json(batch_file, data)
 
     print(f"Created {len(batches)} batches ({len(calcs)} calculations, {BATCH_SIZE} per batch)")
     print(f"Tracking file: {batch_file}")
@@ -121,67 +392,63 @@ def show_next_batch(twb_path):
         print("No batches initialized. Run 'init' first.")
         return
 
-    with open(batch_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Find first pending batch
-    pending = [b for b in data['batches'] if b['status'] == 'pending']
+    data = load_batches(batch_file)
 
-    if not pending:
+    # Batch numbers run 1..N, so the first pending batch is a direct lookup
+    if data['next_pending'] is None:
         print("All batches complete!")
         show_status(twb_path)
         return
 
-    batch = pending[0]
+    batch = data['batches'][data['next_pending'] - 1]
     total_batches = len(data['batches'])
 
-    print(f"\n{'='*60}")
-    print(f"  BATCH {batch['num']} of {total_batches}")
-    print(f"{'='*60}\n")
-
     # Re-read current state from workbook to get latest formulas
-    current_calcs = {c['name']: c for c in extract_calculations(twb_path)}
+    current_calcs = extract_calculations_by_name(twb_path)
 
-    for i, calc_name in enumerate(batch['calcs'], 1):
-        calc = current_calcs.get(calc_name, batch['details'][i-1])
+    # Build the whole report and print it with a single write
+    lines = [
+        f"\n{'='*60}",
+        f"  BATCH {batch['num']} of {total_batches}",
+        f"{'='*60}\n",
+    ]
 
-        print(f"[{i}] Name: {calc['name']}")
-        print(f"    Caption: {calc.get('caption', '(none)')}")
+    for i, calc_name in enumerate(batch['names'], 1):
+        calc = current_calcs.get(calc_name) or data['calculations'][calc_name]
 
-        # Format formula for display (decode XML entities)
-        formula = calc.get('formula', '')
-        formula_display = formula.replace('&#13;&#10;', '\n').replace('&amp;', '&')
+        lines.append(f"[{i}] Name: {calc_name}")
+        lines.append(f"    Caption: {calc.get('caption', '(none)')}")
 
-        # Truncate very long formulas
-        if len(formula_display) > 500:
-            formula_display = formula_display[:500] + '...'
+        # Format formula for display: truncate very long formulas first so
+        # the entity decoding only touches what is actually printed
+        formula = calc.get('formula', '')
+        formula_display = formula[:500].replace('&#13;&#10;', '\n').replace('&amp;', '&')
+        if len(formula) > 500:
+            formula_display += '...'
 
-        print(f"    Formula: {formula_display}")
+        lines.append(f"    Formula: {formula_display}")
 
         # Check current comment status
         current = calc.get('current_comment')
         if current:
             # Check if it's a lazy comment
-            lazy_patterns = [
-                r'^//\s*(calculated\s+field|calculation|formula|field)\s*$',
-                r'^//\s*\w{1,6}\s*$',
-            ]
-            is_lazy = any(re.match(p, current, re.IGNORECASE) for p in lazy_patterns)
+            is_lazy = any(p.match(current) for p in LAZY_PATTERNS)
             if is_lazy:
-                print(f"    Current Comment: {current}  ← LAZY, needs improvement!")
+                lines.append(f"    Current Comment: {current}  ← LAZY, needs improvement!")
             else:
-                print(f"    Current Comment: {current}")
+                lines.append(f"    Current Comment: {current}")
         else:
-            print(f"    Current Comment: (none)")
+            lines.append(f"    Current Comment: (none)")
 
-        print()
+        lines.append("")
 
-    print(f"{'='*60}")
-    print(f"Add a comment explaining the PURPOSE of each calculation above.")
-    print(f"Comments must be 15+ characters and explain WHY, not just WHAT.")
-    print(f"\nWhen done, run:")
-    print(f"  python batch_comments.py \"{twb_path}\" done {batch['num']}")
-    print(f"{'='*60}\n")
+    lines.append(f"{'='*60}")
+    lines.append(f"Add a comment explaining the PURPOSE of each calculation above.")
+    lines.append(f"Comments must be 15+ characters and explain WHY, not just WHAT.")
+    lines.append(f"\nWhen done, run:")
+    lines.append(f"  python batch_comments.py \"{twb_path}\" done {batch['num']}")
+    lines.append(f"{'='*60}\n")
+    print('\n'.join(lines))
 
 
 def mark_batch_done(twb_path, batch_num):
@@ -192,8 +459,7 @@ def mark_batch_done(twb_path, batch_num):
         print("No batches initialized. Run 'init' first.")
         return
 
-    with open(batch_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_batches(batch_file)
 
     # Find the batch
     batch = None
@@ -206,19 +472,15 @@ def mark_batch_done(twb_path, batch_num):
         print(f"Batch {batch_num} not found.")
         return
 
-    # Verify comments were actually added
-    current_calcs = {c['name']: c for c in extract_calculations(twb_path)}
+    # Verify comments were actually added (spot-check this batch before a full parse)
+    current_calcs = spot_check_calculations(twb_path, batch['names'])
+    if current_calcs is None:
+        current_calcs = extract_calculations_by_name(twb_path)
 
     missing = []
     lazy = []
 
-    lazy_patterns = [
-        r'^//\s*(calculated\s+field|calculation|formula|field)\s*$',
-        r'^//\s*\w{1,6}\s*$',
-        r'^//\s*(this|the|a|an)\s+\w+\s*$',
-    ]
-
-    for calc_name in batch['calcs']:
+    for calc_name in batch['names']:
         calc = current_calcs.get(calc_name)
         if not calc:
             continue
@@ -231,7 +493,7 @@ def mark_batch_done(twb_path, batch_num):
             comment_text = comment.replace('//', '').strip()
             if len(comment_text) < 15:
                 lazy.append((calc_name, f"too short ({len(comment_text)} chars)"))
-            elif any(re.match(p, comment, re.IGNORECASE) for p in lazy_patterns):
+            elif any(p.match(comment) for p in DONE_LAZY_PATTERNS):
                 lazy.append((calc_name, "generic/lazy pattern"))
 
     if missing or lazy:
@@ -250,14 +512,16 @@ def mark_batch_done(twb_path, batch_num):
         print(f"\nFix these before marking batch complete.")
         return
 
-    # Mark complete
+    # Mark complete (re-marking a finished batch must not count it twice)
+    if batch['status'] != 'complete':
+        data['completed_count'] += 1
     batch['status'] = 'complete'
     batch['completed_at'] = datetime.now().isoformat()
+    data['next_pending'] = next((b['num'] for b in data['batches'] if b['status'] == 'pending'), None)
 
-    with open(batch_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    write_json(batch_file, data)
 
-    completed = len([b for b in data['batches'] if b['status'] == 'complete'])
+    completed = data['completed_count']
     total = len(data['batches'])
 
     print(f"✓ Batch {batch_num} marked complete ({completed}/{total} batches done)")
@@ -276,38 +540,43 @@ def show_status(twb_path):
         print("No batches initialized. Run 'init' first.")
         return
 
-    with open(batch_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_batches(batch_file)
 
-    completed = len([b for b in data['batches'] if b['status'] == 'complete'])
+    completed = data['completed_count']
     total = len(data['batches'])
     pct = (completed / total * 100) if total > 0 else 0
 
-    print(f"\n{'='*40}")
-    print(f"  Comment Batch Progress")
-    print(f"{'='*40}")
-    print(f"  Workbook: {data['workbook']}")
-    print(f"  Total calculations: {data['total_calcs']}")
-    print(f"  Batch size: {data['batch_size']}")
-    print(f"  Batches: {completed}/{total} ({pct:.0f}%)")
-    print(f"{'='*40}")
+    lines = [
+        f"\n{'='*40}",
+        f"  Comment Batch Progress",
+        f"{'='*40}",
+        f"  Workbook: {data['workbook']}",
+        f"  Total calculations: {data['total_calcs']}",
+        f"  Batch size: {data['batch_size']}",
+        f"  Batches: {completed}/{total} ({pct:.0f}%)",
+        f"{'='*40}",
+    ]
 
     # Show batch breakdown
-    print("\nBatch Status:")
+    lines.append("\nBatch Status:")
     for batch in data['batches']:
         status_icon = "✓" if batch['status'] == 'complete' else "○"
-        print(f"  {status_icon} Batch {batch['num']}: {batch['status']}")
+        lines.append(f"  {status_icon} Batch {batch['num']}: {batch['status']}")
 
-    if completed < total:
-        next_batch = next((b for b in data['batches'] if b['status'] == 'pending'), None)
-        if next_batch:
-            print(f"\nNext: python batch_comments.py \"{twb_path}\" next")
+    if data['next_pending'] is not None:
+        lines.append(f"\nNext: python batch_comments.py \"{twb_path}\" next")
+
+    print('\n'.join(lines))
 
 
 def reset_batches(twb_path):
     """Reset all batch tracking."""
     batch_file = get_batch_file(twb_path)
 
+    cache_file = get_calcs_cache_file(twb_path)
+    if cache_file.exists():
+        cache_file.unlink()
+
     if batch_file.exists():
         batch_file.unlink()
         print("Batch tracking reset.")
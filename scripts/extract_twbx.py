@@ -2,18 +2,41 @@
 """Extract a .twbx file and return path to the .twb inside."""
 import os
 import sys
+import shutil
 import zipfile
 import tempfile
 import json
 import glob
 
-def extract_twbx(twbx_path, extract_dir=None):
+# Chunk size when streaming a single member out of the archive
+COPY_BUFFER_SIZE = 1 << 20
+
+def extract_twb_member(zf, extract_dir):
+    """
+    Stream only the first .twb member of an open archive into extract_dir.
+
+    Returns:
+        Path to the written .twb, or None if the archive has no .twb
+    """
+    for info in zf.infolist():
+        if info.is_dir() or not info.filename.lower().endswith('.twb'):
+            continue
+        # basename only - never trust archive paths to stay inside extract_dir
+        twb_path = os.path.join(extract_dir, os.path.basename(info.filename))
+        with zf.open(info) as src, open(twb_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        return twb_path
+    return None
+
+def extract_twbx(twbx_path, extract_dir=None, twb_only=False):
     """
     Extract a .twbx file and find the .twb inside.
 
     Args:
         twbx_path: Path to the .twbx file
         extract_dir: Optional directory to extract to (default: temp directory)
+        twb_only: If True, extract just the .twb and skip data extracts/images.
+            Faster for read-only checks, but the folder cannot be repackaged.
 
     Returns:
         dict with 'success', 'extract_dir', 'twb_path', and optional 'error'
@@ -29,16 +52,30 @@ def extract_twbx(twbx_path, extract_dir=None):
     else:
         os.makedirs(extract_dir, exist_ok=True)
 
+    twb_files = []
     try:
-        with zipfile.ZipFile(twbx_path, 'r') as zf:
-            zf.extractall(extract_dir)
+        with open(twbx_path, 'rb') as f:
+            # Members are read front to back - let the kernel read ahead
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+            with zipfile.ZipFile(f, 'r') as zf:
+                if twb_only:
+                    twb_path = extract_twb_member(zf, extract_dir)
+                    if twb_path:
+                        twb_files.append(twb_path)
+                else:
+                    zf.extractall(extract_dir)
     except zipfile.BadZipFile:
         return {"success": False, "error": "Invalid or corrupted .twbx file"}
     except Exception as e:
         return {"success": False, "error": f"Extraction failed: {e}"}
 
     # Find the .twb file inside
-    twb_files = glob.glob(os.path.join(extract_dir, '**', '*.twb'), recursive=True)
+    if not twb_only:
+        twb_files = glob.glob(os.path.join(extract_dir, '**', '*.twb'), recursive=True)
 
     if not twb_files:
         return {"success": False, "error": "No .twb found in archive"}
@@ -53,14 +90,16 @@ def extract_twbx(twbx_path, extract_dir=None):
     }
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Usage: extract_twbx.py <twbx_path> [extract_dir]"}))
+    args = [a for a in sys.argv[1:] if a != '--twb-only']
+    if not args:
+        print(json.dumps({"error": "Usage: extract_twbx.py <twbx_path> [extract_dir] [--twb-only]"}))
         sys.exit(1)
 
-    twbx_path = sys.argv[1]
-    extract_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    twbx_path = args[0]
+    extract_dir = args[1] if len(args) > 1 else None
+    twb_only = '--twb-only' in sys.argv
 
-    result = extract_twbx(twbx_path, extract_dir)
+    result = extract_twbx(twbx_path, extract_dir, twb_only=twb_only)
     print(json.dumps(result, indent=2))
 
     if not result.get("success"):
@@ -2,16 +2,33 @@
 """Repackage an extracted folder back into a .twbx file."""
 import os
 import sys
+import shutil
 import zipfile
 import json
 
-def repackage(extract_dir, output_path):
+# Already-compressed payloads: deflating them again costs CPU for no size gain
+STORED_EXTENSIONS = ('.hyper', '.tde', '.png', '.jpg', '.jpeg')
+
+# Copy stored payloads in 8 MB reads (ZipFile.write uses 1 MB) - most bytes are in one large extract
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+def iter_files(directory):
+    """Yield the path of every file under directory (one scandir per folder, no os.walk lists)."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
+
+def repackage(extract_dir, output_path, fast=True):
     """
     Repackage an extracted folder back into a .twbx file.
 
     Args:
         extract_dir: Directory containing the extracted workbook contents
         output_path: Path for the output .twbx file
+        fast: Deflate at level 1 (much faster, slightly larger) instead of level 6
 
     Returns:
         dict with 'success', 'output_path', and optional 'error'
@@ -28,19 +45,27 @@ def repackage(extract_dir, output_path):
         os.makedirs(output_dir, exist_ok=True)
 
     try:
-        files_added = []
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for root, dirs, files in os.walk(extract_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, extract_dir)
-                    zf.write(file_path, arcname)
-                    files_added.append(arcname)
+        files_added = 0
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True,
+                             compresslevel=1 if fast else 6) as zf:
+            for file_path in iter_files(extract_dir):
+                arcname = os.path.relpath(file_path, extract_dir)
+                if file_path.lower().endswith(STORED_EXTENSIONS):
+                    # Same entry ZipFile.write would build, streamed with a larger buffer.
+                    # Sizes are known up front, so zipfile switches to Zip64 for >4 GB extracts.
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    with open(file_path, 'rb') as src, zf.open(zinfo, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                else:
+                    # Deflated entries stay on ZipFile.write, which applies the level
+                    zf.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+                files_added += 1
 
         return {
             "success": True,
             "output_path": output_path,
-            "files_included": len(files_added),
+            "files_included": files_added,
             "source_dir": extract_dir
         }
     except Exception as e:
@@ -2,7 +2,14 @@
 """Validate that a .twb file is valid XML."""
 import sys
 import json
-import xml.etree.ElementTree as ET
+
+# Prefer lxml (libxml2) for faster parsing of large workbooks; fall back to stdlib
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
 
 def validate(twb_path):
     """
@@ -15,15 +22,43 @@ def validate(twb_path):
         dict with 'valid' (bool) and optional 'error'
     """
     try:
-        tree = ET.parse(twb_path)
-        root = tree.getroot()
+        root = None
+        has_datasources = has_worksheets = False
+
+        # Stream the whole file (every byte must still be checked for well-formedness)
+        # but drop each element once it ends, so memory stays flat on huge workbooks.
+        # Open the file ourselves: lxml reports a missing path as a generic OSError
+        with open(twb_path, 'rb') as f:
+            if HAS_LXML:
+                events = ET.iterparse(f, events=('start', 'end'), huge_tree=True,
+                                      collect_ids=False, remove_comments=True,
+                                      remove_pis=True)
+            else:
+                events = ET.iterparse(f, events=('start', 'end'))
+
+            stack = []
+            for event, elem in events:
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                if elem.tag == 'datasource' and stack:
+                    has_datasources = True
+                elif elem.tag == 'worksheet' and stack:
+                    has_worksheets = True
+                # Earlier siblings are already gone, so this element is its parent's first child
+                if stack:
+                    del stack[-1][0]
 
         # Basic structural validation
         checks = {
             "has_root": root is not None,
             "root_tag": root.tag if root is not None else None,
-            "has_datasources": root.find('.//datasource') is not None if root is not None else False,
-            "has_worksheets": root.find('.//worksheet') is not None if root is not None else False,
+            "has_datasources": has_datasources,
+            "has_worksheets": has_worksheets,
         }
 
         return {